@@ -9,6 +9,10 @@ Modules
 __init__.py
     Import core functions from the modules.
 
+_kernels.py
+    Numba-compiled loops (floodfill, line lengths, groupby mean) used by
+    detect.py and function.py.
+
 detect.py
     Detect axes, function, tickmarks and tickvalues from an image array.
 
@@ -30,4 +34,5 @@ cnn
     Folder with the CNN tensorflow model weights.
 
 """
-from .main import function_from_picture, fourier_function_from_picture
+from .main import (function_from_picture, fourier_function_from_picture,
+                   batch_function_from_pictures)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Compiled loops used by the detection and function modules.
+
+The loops are compiled with numba. cache=True stores the compiled code on
+disk, so the compilation cost is only paid on the first run. nogil=True
+lets pictures be processed in parallel threads.
+
+Methods defined here
+---------------------
+maxlens(pic)
+    Row and column line lengths of pic, in a single pass over the picture.
+
+flood(pic, i0, j0)
+    Floodfill the 8-connected 1's around (i0,j0), setting them to 0.
+
+groupby_mean(ivals, jvals)
+    Average the jvals that share the same ivals value.
+
+"""
+import numpy as np
+from numba import njit
+
+@njit(cache=True, nogil=True)
+def maxlens(pic):
+    """Row and column line lengths of pic, in a single pass over the picture.
+
+    The current run length of every column is kept while walking the rows, so
+    the picture is read only once and no padded copies are made.
+    """
+    ni, nj = pic.shape
+    rowlens = np.zeros(ni, dtype=np.int64)
+    collens = np.zeros(nj, dtype=np.int64)
+    colruns = np.zeros(nj, dtype=np.int64)
+    for i in range(ni):
+        rowrun = 0
+        for j in range(nj):
+            if pic[i,j] == 1:
+                rowrun += 1
+                colruns[j] += 1
+                rowlens[i] = max(rowlens[i], rowrun)
+                collens[j] = max(collens[j], colruns[j])
+            else:
+                rowrun = 0
+                colruns[j] = 0
+    return rowlens, collens
+
+@njit(cache=True, nogil=True)
+def flood(pic, i0, j0):
+    """Floodfill the 8-connected 1's around (i0,j0), setting them to 0.
+
+    The array with the removed indices doubles as the queue of the fill:
+    every pixel is cleared when it is queued, so it is never visited twice.
+    It starts small and doubles when full, so the work only depends on the
+    size of the filled blob, not on the size of the picture.
+
+    Parameters
+    ----------
+    pic : np.array
+        (x,y) array with 1's and 0's. Modified in place.
+    i0 : int
+        The I index of the starting point.
+    j0 : int
+        The J index of the starting point.
+
+    Returns
+    -------
+    np.array
+        nx2 array with the indices of the removed pixels.
+
+    """
+    ni, nj = pic.shape
+    ids = np.empty((64,2), dtype=np.int32)
+    ids[0,0] = i0
+    ids[0,1] = j0
+    pic[i0,j0] = 0
+    head, tail = 0, 1
+    while head < tail:
+        i, j = ids[head,0], ids[head,1]
+        head += 1
+        for di in range(-1,2):
+            for dj in range(-1,2):
+                ii, jj = i+di, j+dj
+                if 0 <= ii < ni and 0 <= jj < nj and pic[ii,jj] == 1:
+                    pic[ii,jj] = 0
+                    if tail == len(ids):  # full: double the queue
+                        grown = np.empty((2*len(ids),2), dtype=np.int32)
+                        grown[:tail] = ids
+                        ids = grown
+                    ids[tail,0] = ii
+                    ids[tail,1] = jj
+                    tail += 1
+    return ids[:tail]
+
+@njit(cache=True, nogil=True)
+def groupby_mean(ivals, jvals):
+    """Average the jvals that share the same ivals value.
+
+    After sorting, the groups are summed in a single pass, writing straight
+    into the (preallocated) output arrays.
+
+    Parameters
+    ----------
+    ivals : np.array
+        1D array with the values to group by.
+    jvals : np.array
+        1D array with the values to average.
+
+    Returns
+    -------
+    np.array
+        The sorted unique values of ivals.
+    np.array
+        The mean of jvals for every unique value of ivals.
+
+    """
+    n = len(ivals)
+    sortids = np.argsort(ivals)
+    iuniq = np.empty(n, dtype=np.float64)
+    jmean = np.empty(n, dtype=np.float64)
+    ngroups = 0
+    jsum = 0.0
+    count = 0
+    for k in range(n):
+        i = ivals[sortids[k]]
+        if count > 0 and i != iuniq[ngroups]:
+            jmean[ngroups] = jsum/count
+            ngroups += 1
+            jsum = 0.0
+            count = 0
+        iuniq[ngroups] = i
+        jsum += jvals[sortids[k]]
+        count += 1
+    if count > 0:
+        jmean[ngroups] = jsum/count
+        ngroups += 1
+    return iuniq[:ngroups], jmean[:ngroups]
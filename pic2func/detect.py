@@ -6,6 +6,9 @@ Methods defined here
 detect_axes(pic, minlen_axis=0.1, verbose=False)
     Seek for the x and y axes in a picture.
 
+get_maxlens(pic)
+    Get the length of the longest line of 1's in every row and column of pic.
+
 detect_line(v, L)
     Detects whether there is a line of 1's in a vector v, longer than L.
 
@@ -50,11 +53,12 @@ obj_edge_dist(A,B)
     Returns the closest distance between x_i and y_j elements.
 
 """
-import os
-import subprocess
 import numpy as np
 import imageio as im
+from PIL import Image
+from scipy.spatial import cKDTree
 from .imgfuncs import get_xydim, xy2imframe
+from ._kernels import flood, maxlens
 
 def detect_axes(pic, minlen_axis=0.1, verbose=False):
     """Seek for the x and y axes in a picture.
@@ -95,38 +99,45 @@ def detect_axes(pic, minlen_axis=0.1, verbose=False):
         print("mini:",mini)
         print("minj:",minj)
 
-    # Detection
-    possjaxes, possiaxes = [], []
-    possjlens, possilens = [], []
-
-    for i in range(ni):
-        detect, maxl = detect_line(pic[i,:],minj)
-        if detect:
-            possjaxes.append(i)
-            possjlens.append(maxl)
-    for j in range(nj):
-        detect, maxl = detect_line(pic[:,j],mini)
-        if detect:
-            possiaxes.append(j)
-            possilens.append(maxl)
+    # Detection: longest line of 1's in every row (J-axis candidates) and in
+    # every column (I-axis candidates)
+    jlens, ilens = get_maxlens(pic)
+    possjaxes = np.flatnonzero(jlens >= minj)
+    possiaxes = np.flatnonzero(ilens >= mini)
 
     if verbose:
-        print("possiaxes:",possiaxes)
-        print("possjaxes:",possjaxes)
-    if possiaxes:  # If possitibilites for J axis are found
-        longest_iaxis_index = np.argmax(possilens)
-        iaxis = possiaxes[longest_iaxis_index]
-        # iaxis = max(set(possiaxes), key=possiaxes.count)
-    if possjaxes:  # If possitibilites for J axis are found
-        longest_jaxis_index = np.argmax(possjlens)
-        jaxis = possjaxes[longest_jaxis_index]
-        # jaxis = max(set(possjaxes), key=possjaxes.count)
+        print("possiaxes:",possiaxes.tolist())
+        print("possjaxes:",possjaxes.tolist())
+    if possiaxes.size:  # If possitibilites for I axis are found
+        iaxis = int(np.argmax(ilens))
+    if possjaxes.size:  # If possitibilites for J axis are found
+        jaxis = int(np.argmax(jlens))
     if verbose:
         print("I-axis goes through J=",iaxis)
         print("J-axis goes through I=",jaxis)
 
     return iaxis,jaxis
 
+def get_maxlens(pic):
+    """Get the length of the longest line of 1's in every row and every column
+    of pic.
+
+    Parameters
+    ----------
+    pic : np.array
+        (x,y) array with 1's and 0's.
+
+    Returns
+    -------
+    np.array
+        1D array with the length of the longest line in each row (0 if the
+        row has no 1's).
+    np.array
+        1D array with the length of the longest line in each column.
+
+    """
+    return maxlens(pic)
+
 def detect_line(v, L):
     """
     Detects whether there is a line of 1's in a vector v, longer than L.
@@ -151,7 +162,7 @@ def detect_line(v, L):
     # Add zeros at the extrema's, for the case v starts/ends
     # with 1s. Then we get a correct start/stop condition at
     # the endpoints.
-    v0 = np.array([0] + v.tolist()+[0]) # add zero at extrema
+    v0 = np.pad(v.astype(int), 1) # add zero at extrema
     diff = v0[1:]-v0[:-1] # -1(stop), 0 or 1(start)
     startids = np.where(diff==1)[0]
     stopids = np.where(diff==-1)[0]
@@ -185,8 +196,8 @@ def get_ticks(pic_g, axes):
     """
     iax_jval = axes[0]
     jax_ival = axes[1]
-    iaxis = np.array(([0] + (pic_g[:,iax_jval]).tolist() + [0]))
-    jaxis = np.array(([0] + (pic_g[jax_ival,:]).tolist() + [0]))
+    iaxis = np.pad(pic_g[:,iax_jval], 1)  # add zero at extrema
+    jaxis = np.pad(pic_g[jax_ival,:], 1)
     iticks = get_tickmeans(iaxis)
     jticks = get_tickmeans(jaxis)
     return iticks, jticks
@@ -206,7 +217,7 @@ def get_tickmeans(v):
     list
         The indices of the tickmarks in the vector.
     """
-    diff = v[1:]-v[:-1]  # -1(stop), 0 or 1(start)
+    diff = np.diff(v.astype(int))  # -1(stop), 0 or 1(start)
     startids = np.where(diff==1)[0]
     stopids = np.where(diff==-1)[0]
     if len(startids) == 0:  # No 1s in v ...
@@ -216,11 +227,8 @@ def get_tickmeans(v):
     # len(stopids) == len(startids) due to added zeros to v
     assert len(stopids) == len(startids), "Unequal start and stop ids."
     ticlens = stopids-startids
-    ticks = []
-    for startid,ticklen in zip(startids,ticlens):
-        tick = startid + int(ticklen/2)
-        ticks.append(tick)
-    return ticks
+    ticks = startids + ticlens//2
+    return ticks.tolist()
 
 def remove_ticks(pic, axes, iticks, jticks):
     """Removes the tickmarks from the green-channel picture.
@@ -276,30 +284,10 @@ def remove_tick(pic, J, I):
     np.array
         (x,y) array with 1's and 0's. 1 is green, 0 is not green.
         This is pic with the tickmark removed.
-    tuple
-        (I,J), the indices of the removed tickmark.
+    np.array
+        nx2 array with the (I,J) indices of the removed tickmark.
     """
-    ones = [[I,J]]
-    done = False
-    tick_ids = []
-    iteration = 1
-    while not done:
-        for one in ones:
-            pic[one[0], one[1]] = 0
-            tick_ids.append(one)
-        new_ones = []
-        for one in ones:
-            i = one[0]
-            j = one[1]
-            testids = [[i+1,j+1], [i+1,j], [i+1,j-1], [i,j+1], [i,j-1],
-                       [i-1,j+1], [i-1,j], [i-1,j-1]]
-            for tid in testids:
-                if pic[tid[0],tid[1]] == 1:
-                    new_ones.append(tid)
-        ones = [list(x) for x in set(tuple(x) for x in new_ones)]
-        if not ones:  # if ones is empty:
-            done = True
-        iteration += 1
+    tick_ids = flood(pic, I, J)
     return pic,tick_ids
 
 def get_tickvals(pic, tick_pickids, proximity=0.05, verbose=False):
@@ -337,7 +325,7 @@ def get_tickvals(pic, tick_pickids, proximity=0.05, verbose=False):
 
 def scale_numbers(numbers, a=28, verbose=False):
     """Scales the list of number arrays to an axa black and white array, which
-    is saved to a jpg file. The jpg file serves as input for the classifier.
+    serves as input for the classifier.
 
     Parameters
     ----------
@@ -346,28 +334,28 @@ def scale_numbers(numbers, a=28, verbose=False):
         contains the pixels that form a number.
     a : int
         The length of the side of the square. Default is 28.
+    verbose : bool
+        If True, the scaled digits are also saved to png files.
 
     Returns
     -------
     list
-        The list of scaled number arrays.
+        The list of scaled number arrays (float16, between 0 and 1).
 
     """
     scaled_numbers = []
     for n, number in enumerate(numbers):
         scaled_digits = []
         for d, digit in enumerate(number):
-            fn = "" + str(n) + "_" + str(d) + "_digit.tiff"
-            on = "scaled_" + str(n) + "_" + str(d) + "_digit.jpg"
-            im.imwrite(fn, xy2imframe(digit))
-            cmd = ['convert', fn, '-resize', str(a), '-quality', '100', on]
-            exe = subprocess.Popen(cmd, stdin = subprocess.PIPE, shell=False)
-            exe.communicate()
-            scaled_digit = im.imread(on) / 255
-            scaled_digits.append(scaled_digit)
-            if not verbose:
-                os.remove(fn)
-                os.remove(on)
+            digitpic = Image.fromarray((xy2imframe(digit)*255).astype(np.uint8))
+            scaled_digit = np.asarray(digitpic.resize(
+                (a,a), Image.Resampling.LANCZOS))
+            if verbose:
+                on = "scaled_" + str(n) + "_" + str(d) + "_digit.png"
+                im.imwrite(on, scaled_digit)
+            # float16 is plenty for 8-bit pixel values, at 1/4 the memory
+            scaled_digits.append(scaled_digit.astype(np.float16) /
+                                 np.float16(255))
         scaled_numbers.append(scaled_digits)
 
     return scaled_numbers
@@ -416,13 +404,10 @@ def make_square(digit):
     shift = int(n_max/8)
     delta = int((j_max - i_max)/2)
     digit_array = np.zeros([n_max+shift*2,n_max+shift*2])
-    for i,j in zip(digit[:,0],digit[:,1]):
-        if delta > 0:
-            digit_array[i+shift+delta,j+shift] = 1
-        elif delta < 0:
-            digit_array[i+shift,j+shift+delta] = 1
-        else:
-            digit_array[i+shift,j+shift] = 1
+    # Center the digit along its shortest side
+    ii = digit[:,0] + shift + max(delta,0)
+    jj = digit[:,1] + shift + max(-delta,0)
+    digit_array[ii,jj] = 1
 
     return digit_array
 
@@ -462,30 +447,11 @@ def grow_and_remove_number(pic, startone):
     np.array
         (x,y) array with 1's and 0's. 1 is green, 0 is not green.
         This is pic with the number removed.
-    list
-        The indices of the removed number.
+    np.array
+        nx2 array with the (I,J) indices of the removed number.
 
     """
-    ones = [[startone[0],startone[1]]]
-    done = False
-    tick_ids = []
-    iteration = 1
-    while not done:
-        for one in ones:
-            pic[one[0],one[1]] = 0
-            tick_ids.append(one)
-        new_ones = []
-        for one in ones:
-            i,j = one[0], one[1]
-            testids = [[i+1,j+1], [i+1,j], [i+1,j-1], [i,j+1], [i,j-1],
-                       [i-1,j+1], [i-1,j], [i-1,j-1]]
-            for tid in testids:
-                if pic[tid[0],tid[1]] == 1:
-                    new_ones.append(tid)
-        ones = [list(x) for x in set(tuple(x) for x in new_ones)]
-        if not ones:  # if ones is empty:
-            done = True
-        iteration += 1
+    tick_ids = flood(pic, startone[0], startone[1])
     return pic, tick_ids
 
 def group_ticks(ticks,digits):
@@ -506,37 +472,26 @@ def group_ticks(ticks,digits):
         The groups of ticks and digits.
 
     """
-    ndigits = len(digits)
-    # We need ndigits assignments, and Nticks groups
-    assignments = 0
     # First element of each group is the tick, then digits
     groups = [[el] for el in ticks]
-    # First we assign one digit to each tickmark, i.e. the closest one
+    # First we assign one digit to each tickmark, i.e. the closest one.
+    # A k-d tree per digit gives the distance of each tick pixel to the
+    # nearest digit pixel.
+    trees = [cKDTree(digit) for digit in digits]
     for i,tick in enumerate(ticks):
-        dists = []
-        for digit in digits:
-            dists.append(obj_edge_dist(tick, digit))
+        dists = [np.min(tree.query(tick)[0]) for tree in trees]
         min_id = np.argmin(dists)
+        trees.pop(min_id)
         groups[i].append(digits.pop(min_id))
-        assignments += 1
-    # And now we search the closest group for each digit.
-    # Let me assume we don't get weird cases here...
-    while assignments < ndigits:
-        for i, digit in enumerate(digits):
-            dists = []
-            for group in groups:
-                mindist_group_to_el = None
-                for groupel in group:
-                    if mindist_group_to_el is None:
-                        mindist_group_to_el = obj_edge_dist(groupel, digit)
-                    else:
-                        mintest = obj_edge_dist(groupel, digit)
-                        if mintest < mindist_group_to_el:
-                            mindist_group_to_el = mintest
-                dists.append(mindist_group_to_el)
-            min_id = np.argmin(dists)
-            groups[min_id].append(digits.pop(0))
-            assignments += 1
+    # And now we search the closest group for each remaining digit, with one
+    # k-d tree over all pixels of each group (rebuilt when the group grows).
+    grouptrees = [cKDTree(np.concatenate(group)) for group in groups]
+    while digits:
+        digit = digits.pop(0)
+        dists = [np.min(tree.query(digit)[0]) for tree in grouptrees]
+        min_id = np.argmin(dists)
+        groups[min_id].append(digit)
+        grouptrees[min_id] = cKDTree(np.concatenate(groups[min_id]))
     return groups
 
 def get_ijcurve(piccurve):
@@ -551,17 +506,14 @@ def get_ijcurve(piccurve):
     Returns
     -------
     np.array
-        The indices of the 1's in the piccurve.
+        nx2 array with the (I,J) indices of the 1's in the piccurve, sorted
+        by I and then by J.
     """
-    ni,nj = get_xydim(piccurve)
-    ijpoints = []
-    for i in range(ni):
-        for j in range(nj):
-            if piccurve[i,j] == 1:
-                ijpoints.append(np.array([i,j]))
-    return np.array(ijpoints)
+    return np.argwhere(piccurve == 1)
 
 def obj_edge_dist(aa, bb):
     """Returns the closest distance between aa_i and bb_j elements."""
-    return np.min(np.array([[(a[0] - b[0])**2 + (a[1] - b[1])**2 for a in aa]\
-                            for b in bb]))
+    aa = np.asarray(aa)
+    bb = np.asarray(bb)
+    return np.min((aa[:,None,0] - bb[None,:,0])**2 +
+                  (aa[:,None,1] - bb[None,:,1])**2)
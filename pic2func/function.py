@@ -30,6 +30,9 @@ nogibbsdftsample(x, nc, nis, nos=200)
 
 """
 import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import czt
+from ._kernels import groupby_mean
 
 def get_xyfunc(curveij,ixticks,jyticks,axes):
     """
@@ -56,7 +59,7 @@ def get_xyfunc(curveij,ixticks,jyticks,axes):
     """
     fij = ijcurve_to_ijfunction(curveij) #
     scale_ij_to_xy, shift_ij = get_scaleandshift_ijtoxy(ixticks, jyticks, axes)
-    fxy = np.matmul((fij+shift_ij),scale_ij_to_xy)
+    fxy = (fij+shift_ij)*scale_ij_to_xy
     return fxy
 
 def ijcurve_to_ijfunction(curve):
@@ -76,25 +79,9 @@ def ijcurve_to_ijfunction(curve):
         n_unique_ivals x 2 array with (I,J) points of the function.
 
     """
-    ivals = curve[:,0]
-    jvals = curve[:,1]
-    sortids = ivals.argsort()
-    isort = ivals[sortids]
-    jsort = jvals[sortids]
-    ijfunc = []
-    ivals=[]
-    spin = isort[0]
-    val = [jsort[0]]
-    for I,J in zip(isort[1:],jsort[1:]):
-        if I == spin:
-            val = val + [J]
-        else:
-            ijfunc.append(np.mean(np.array(val)))
-            ivals.append(spin)
-            spin = I
-            val = [J]
-
-    return (np.array([ivals, ijfunc])).T
+    iuniq, ijfunc = groupby_mean(curve[:,0], curve[:,1])
+
+    return np.column_stack([iuniq, ijfunc])
 
 def get_scaleandshift_ijtoxy(ixticks, jyticks, axes):
     """Using the ticks, the ij function can be converted to an xy function.
@@ -114,7 +101,7 @@ def get_scaleandshift_ijtoxy(ixticks, jyticks, axes):
     Returns
     -------
     np.array
-        2x2 array with the scale.
+        2x1 array with the (x/I, y/J) scale.
     np.array
         2x1 array with the shift (negative of origin in ij coordinates).
 
@@ -123,49 +110,39 @@ def get_scaleandshift_ijtoxy(ixticks, jyticks, axes):
     assert len(ixticks) > 0, "No ticks found in I axis."
     assert len(jyticks) > 0, "No ticks found in J axis."
     # Define the crosspoint of I, J axes in ij coordinates
-    crossij = np.array([axes[1],axes[0]])  # crosspoint of the axes
-
-    # Define the first tick of I, J axes in ij coordinates
-    i1 = np.array([ixticks[0][0], 0])  # first tick of I
-    j1 = np.array([0, jyticks[0][0]])  # first tick of J
-    # And their corresponding ticks in xy coordinates
-    x1 = np.array([ixticks[0][1], 0])  # first tick of X
-    y1 = np.array([0, jyticks[0][1]])  # first tick of Y
+    icross, jcross = axes[1], axes[0]  # crosspoint of the axes
+
+    # Define the first tick of I, J axes in ij coordinates, and their
+    # corresponding tick values in xy coordinates (plain scalars)
+    i1, x1 = ixticks[0]  # first tick of I, X
+    j1, y1 = jyticks[0]  # first tick of J, Y
     # If a second tick is given, define it as well
     if len(ixticks)==2:
-        i2 = np.array([ixticks[1][0], 0])  # second tick of I
-        x2 = np.array([ixticks[1][1], 0])  # second tick of X
+        i2, x2 = ixticks[1]  # second tick of I, X
     elif len(ixticks)>2:
         msg = "More than 2 tickmarks along one axis is not supported yet."
         raise NotImplementedError(msg)
     else:  # if only one tick is given, assume the second tick is at the origin
-        assert i1[0] != 0, "If you use only one x-tick, it cannot be 0."
-        i2 = np.array([crossij[0], 0])  # second tick of I
-        x2 = np.array([0, 0])  # second tick of X
+        assert x1 != 0, "If you use only one x-tick, it cannot be 0."
+        i2, x2 = icross, 0  # second tick of I, X
     if len(jyticks)==2:
-        j2 = np.array([0, jyticks[1][0]])
-        y2 = np.array([0, jyticks[1][1]])
+        j2, y2 = jyticks[1]  # second tick of J, Y
     elif len(jyticks)>2:
         msg = "More than 2 tickmarks along one axis is not supported yet."
         raise NotImplementedError(msg)
     else:
-        assert j1[1] != 0, "If you use only one y-tick, it cannot be 0."
-        j2 = np.array([0, crossij[1]])  # second tick of J
-        y2 = np.array([0, 0])  # second tick of Y
+        assert y1 != 0, "If you use only one y-tick, it cannot be 0."
+        j2, y2 = jcross, 0  # second tick of J, Y
 
-    xscale = (x2[0]-x1[0])/(i2[0]-i1[0])  # x/I
-    yscale = (y2[1]-y1[1])/(j2[1]-j1[1])  # y/J
-    scale = np.array([[xscale,0],[0,yscale]])  # 2x2
+    xscale = (x2-x1)/(i2-i1)  # x/I
+    yscale = (y2-y1)/(j2-j1)  # y/J
+    jorig = -y2/yscale + j2
+    iorig = -x2/xscale + i2
 
-    jorig = -y2[1]/yscale + j2[1]
-    iorig = -x2[0]/xscale + i2[0]
+    scale = np.array([xscale,yscale])  # 2x1
     shift = -np.array([iorig,jorig])  # 2x1
 
-    # Print all variables defined in this function
-    # for name, value in locals().items():
-    #    print(name, value)
-
-    return scale, shift  # xy = scale.(ij + shift)
+    return scale, shift  # xy = scale*(ij + shift)
 
 def dft(x,nc):
     """
@@ -176,12 +153,11 @@ def dft(x,nc):
     Or, since the DFT spectrum is periodic, we get 0, 1, ..., 2*B.
     """
     p = len(x)
-    n = np.array(list(range(p)))
-    k = np.array(list(range(-nc, nc, 1)))
-    f = np.array([[np.exp(-1j*2*np.pi/p*i*j) for i in n] for j in k])
-    X = np.matmul(f,x)
+    # x is real, so X[-k] = conj(X[k]): the real FFT only holds k = 0, ..., p/2
+    X = rfft(x)
+    X[nc+1:] = 0  # keep k = 0, ..., nc (and implicitly k = -nc, ..., -1)
 
-    return 1/p*np.matmul(X,np.conj(f))
+    return irfft(X, n=p)
 
 
 def dftsample(x,nc,nis,nos=200):
@@ -191,44 +167,57 @@ def dftsample(x,nc,nis,nos=200):
     x recreated at different points, you will need to create a different def.
     Aka, we get the coefficients -B,-B+1, ..., -1, 0, 1, 2, ..., B, B.
     Or, since the DFT spectrum is periodic, we get 0, 1, ..., 2*B.
-    """
-    p = len(x)
 
-    n = np.array(list(range(p)))
-    k = np.array(list(range(-nc, nc, 1)))
-    f = np.array([[np.exp(-1j*2*np.pi/p*i*j) for i in n] for j in k])
-    X = np.matmul(f,x)
+    With nos = p + 1, the samples fall on n = 0, 1, ..., p, so the first p
+    samples equal dft(x, nc), for an even as well as an odd p:
 
-    nsample=np.linspace(0,len(x),nos)
-    fsample = np.array([[np.exp(-1j*2*np.pi/p*i*j) for i in nsample] for j in k])
+    >>> x = np.random.rand(10)
+    >>> np.allclose(dftsample(x, 5, np.arange(10), nos=11)[1][:10], dft(x, 5))
+    True
+    >>> x = np.random.rand(9)
+    >>> np.allclose(dftsample(x, 3, np.arange(9), nos=10)[1][:9], dft(x, 3))
+    True
+    """
+    p = len(x)
+    # x is real, so X[-k] = conj(X[k]): keep k = 0, ..., nc and count the
+    # positive frequencies twice. For an even p, the Nyquist bin k = p/2 has
+    # no partner and is counted once.
+    X = rfft(x)[:nc+1]
+    X[1:(p+1)//2] *= 2
+
+    # Evaluate the truncated series at nos equispaced points n in [0, p]
+    step = p/(nos-1) if nos > 1 else 0.0
+    w = np.exp(2j*np.pi/p*step)
+    xsample = czt(X, m=nos, w=w).real
     noutputpoints = np.linspace(nis[0],nis[-1],nos)
-    return noutputpoints, 1/p*np.matmul(X,np.conj(fsample))
+    return noutputpoints, 1/p*xsample
 
 def nogibbsdftsample(x,nc,nis,nos=200):
     """
     gibbs phenomenom will occur when x[0] != x[-1]. So we just extend the profile
     left and right, linearly, to reach to eachother. Then we discard those points.
+    The extension is at least 20% of len(x) on each side, and is made a bit
+    longer if that gives a length for which the FFT is fast.
     """
     p = len(x)
-    extra = int(p*0.2)
+    p_extended = next_fast_len(p + 2*int(p*0.2), real=True)
+    extra = (p_extended - p)//2
     mid = (x[-1] + x[0])/2
     xleftextra = np.linspace(mid,x[0],extra)
-    xrightextra = np.linspace(x[-1],mid,extra)
-    x_extended = np.array(xleftextra.tolist()+x.tolist()+xrightextra.tolist())
-    p_extended = len(x_extended)
-
-    n = np.array(list(range(p_extended)))
-    k = np.array(list(range(-nc, nc, 1)))
-    f = np.array([[np.exp(-1j*2*np.pi/p_extended*i*j) for i in n] for j in k])
+    xrightextra = np.linspace(x[-1],mid,p_extended-p-extra)
+    x_extended = np.concatenate([xleftextra, x, xrightextra])
 
-    X = np.matmul(f,x_extended)
+    # x_extended is real, so X[-k] = conj(X[k]): keep k = 0, ..., nc and
+    # count the positive frequencies twice (the Nyquist bin only once).
+    X = rfft(x_extended)[:nc+1]
+    X[1:(p_extended+1)//2] *= 2
 
-    extra_sample = int(nos*0.2)
-    nsample_extended=np.linspace(0,len(x_extended),nos+2*extra_sample)
-    fsample_extended = np.array([[np.exp(-1j*2*np.pi/p_extended*i*j)\
-                                  for i in nsample_extended] for j in k])
-    x_extended_subsampled = 1/p_extended*np.matmul(X,np.conj(fsample_extended))
+    # Evaluate the truncated series at nos equispaced points between the
+    # first (n = extra) and last (n = extra + p - 1) point of the original x.
+    step = (p-1)/(nos-1) if nos > 1 else 0.0
+    w = np.exp(2j*np.pi/p_extended*step)
+    a = np.exp(-2j*np.pi/p_extended*extra)
+    x_subsampled = 1/p_extended*czt(X, m=nos, w=w, a=a).real
 
     noutputpoints =  np.linspace(nis[0],nis[-1],nos)
-    x_subsampled = x_extended_subsampled[extra_sample:-extra_sample]
     return noutputpoints, x_subsampled
@@ -20,10 +20,13 @@ rgb2g(pic,threshold=200)
 rgb2b(pic,threshold=200)
     Extract the blue channel from an rgb(a) picture.
 
+extract_channels(pic, thr_bw=255, thr_c=200, thr_white=250)
+    Extract the bw, red, green and blue channels in one go.
+
 get_xydim(pic)
     Get the x and y dimensions of a picture.
 
-im2xyframe(pic)
+im2xyframe(pic, copy=False)
     Transpose then flip along the second axis.
 
 xy2imframe(pic)
@@ -116,17 +119,60 @@ def rgb2b(pic,threshold=200):
              ((np.mean(pic[:,:,:3], axis=-1) < 250).astype(int)))\
                 == 2).astype(int)
 
+def extract_channels(pic, thr_bw=255, thr_c=200, thr_white=250):
+    """Extract the bw, red, green and blue channels from an rgb(a) picture in
+    one go. Equivalent to rgb2bw, rgb2r, rgb2g and rgb2b, but the sum of
+    the rgb channels is computed only once, in integer arithmetic.
+
+    Parameters
+    ----------
+    pic : np.array
+        (x,y,3) or (x,y,4) with 8-bit values, from.jpg or .png, respectively.
+    thr_bw : int
+        The threshold for the bw conversion. Default is 255 (pure white).
+    thr_c : int
+        The threshold for red, green and blue extraction. Default is 200.
+    thr_white : int
+        Pixels with an rgb average above this are white, and are not
+        extracted as red, green or blue. Default is 250.
+
+    Returns
+    -------
+    tuple
+        (bw, r, g, b), (x,y) boolean arrays. True is black, red, green or
+        blue, respectively.
+
+    """
+    # Compare the integer rgb sum to 3*threshold instead of the float average
+    # to the threshold. uint16 holds the sum of three 8-bit values.
+    sum3 = pic[:,:,0].astype(np.uint16) + pic[:,:,1] + pic[:,:,2]
+    notwhite = sum3 < 3*thr_white
+    return (sum3 < 3*thr_bw,
+            (pic[:,:,0] > thr_c) & notwhite,
+            (pic[:,:,1] > thr_c) & notwhite,
+            (pic[:,:,2] > thr_c) & notwhite)
+
 def get_xydim(pic):
     """Get the x and y dimensions of a picture."""
     return (pic.shape)[0], (pic.shape)[1]
 
-def im2xyframe(pic):
-    """Transpose then flip along the second axis."""
-    return np.flip(pic.T,axis=1)
+def im2xyframe(pic, copy=False):
+    """Transpose then flip along the second axis.
+
+    Only the first two axes are transposed, so an (x,y,3) picture is
+    transformed as a whole, with its color channels left in place.
+    By default a (strided) view is returned. If copy is True, a C-contiguous
+    copy is returned instead, such that later row-by-row scans of the result
+    (and of masks computed from it) walk through memory in order.
+    """
+    pic = np.flip(np.swapaxes(pic,0,1),axis=1)
+    if copy:
+        return np.ascontiguousarray(pic)
+    return pic
 
 def xy2imframe(pic):
-    """Flip along the second axis then transpose."""
-    return (np.flip(pic,axis=1)).T
+    """Flip along the second axis then transpose (the first two axes)."""
+    return np.swapaxes(np.flip(pic,axis=1),0,1)
 
 def plotpic(pic, colbar=False):
     """Plot a picture."""
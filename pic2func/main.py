@@ -5,22 +5,29 @@ Functions to get an (x,y) function from a picture.
 
 Methods defined here
 ---------------------
-function_from_picture(picpath, verbose=False)
+function_from_picture(picpath, verbose=False, quantize=False)
     Get an (x,y) function from a picture.
 
-fourier_function_from_picture(picpath, n=10, verbose=False)
+fourier_function_from_picture(picpath, n=10, verbose=False, quantize=False)
     Get an (x,y) function and its Fourier series from a picture.
 
+batch_function_from_pictures(picpaths, max_workers=None, verbose=False,
+                             quantize=False)
+    Get (x,y) functions from many pictures, using a pool of threads.
+
 """
 import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import imageio as im
-from .predict import define_model, predict_tickvalues
-from .imgfuncs import im2xyframe, rgb2bw, rgb2g, rgb2r
+from .predict import define_model, quantize_model, predict_tickvalues
+from .imgfuncs import im2xyframe, extract_channels
 from .detect import (get_ijcurve, detect_axes, get_ticks, remove_ticks,
                      get_tickvals)
 from .function import get_xyfunc, nogibbsdftsample
 
-def function_from_picture(picpath, verbose=False):
+def function_from_picture(picpath, verbose=False, quantize=False):
     """Get an (x,y) function from a picture.
 
     Parameters
@@ -29,6 +36,10 @@ def function_from_picture(picpath, verbose=False):
         The path to the picture (jpg or png).
     verbose : bool
         If True, print the steps of the process.
+    quantize : bool
+        If True, read the tickvalues with an int8 quantized version of the
+        digit recognition model. It is converted once per process (about a
+        second), after which it is much faster than the Keras model.
 
     Returns
     -------
@@ -38,12 +49,11 @@ def function_from_picture(picpath, verbose=False):
     """
     weightspath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                "cnn/weights.index")
-    digitmodel = define_model()
-    digitmodel.load_weights(weightspath[:-6])
-    picpng = im.imread(picpath)
-    picbw = im2xyframe(rgb2bw(picpng))
-    picticks = im2xyframe(rgb2g(picpng))
-    piccurve = im2xyframe(rgb2r(picpng))
+    digitmodel = _get_model(weightspath[:-6], quantize=quantize)
+    # Keep the rgb channels (no alpha) as 8-bit values, without copying
+    picpng = im.imread(picpath)[:,:,:3].astype(np.uint8, copy=False)
+    # Transform the picture (all channels at once) instead of every mask
+    picbw, piccurve, picticks, _ = extract_channels(im2xyframe(picpng))
     curveij = get_ijcurve(piccurve)
     axes = detect_axes(picbw, verbose=verbose)
     iticks, jticks = get_ticks(picticks, axes)
@@ -53,7 +63,8 @@ def function_from_picture(picpath, verbose=False):
     f = get_xyfunc(curveij, ixticks, jyticks, axes)  # Nx2 array: (x,y) points
     return f
 
-def fourier_function_from_picture(picpath, n=10, verbose=False):
+def fourier_function_from_picture(picpath, n=10, verbose=False,
+                                  quantize=False):
     """Get an (x,y) function and its Fourier series from a picture.
 
     Parameters
@@ -64,6 +75,10 @@ def fourier_function_from_picture(picpath, n=10, verbose=False):
         The number of terms in the Fourier series.
     verbose : bool
         If True, print the steps of the process.
+    quantize : bool
+        If True, read the tickvalues with an int8 quantized version of the
+        digit recognition model. It is converted once per process (about a
+        second), after which it is much faster than the Keras model.
 
     Returns
     -------
@@ -72,21 +87,55 @@ def fourier_function_from_picture(picpath, n=10, verbose=False):
     np.array
         2n+1x2 array: (a,b) coefficients.
 
+    """
+    f = function_from_picture(picpath, verbose=verbose, quantize=quantize)
+    xsample, fsample = nogibbsdftsample(f[:,1], n, f[:,0])
+    return f, xsample, fsample
+
+def batch_function_from_pictures(picpaths, max_workers=None, verbose=False,
+                                 quantize=False):
+    """Get (x,y) functions from many pictures, using a pool of threads.
+
+    All threads share the same (cached) digit recognition model. Image
+    decoding, TensorFlow, the compiled kernels and most NumPy operations
+    release the GIL, so the pictures are processed concurrently.
+
+    Parameters
+    ----------
+    picpaths : list
+        The paths to the pictures (jpg or png).
+    max_workers : int
+        The number of threads. Default is the number of CPUs.
+    verbose : bool
+        If True, print the steps of the process.
+    quantize : bool
+        If True, read the tickvalues with an int8 quantized version of the
+        digit recognition model.
+
+    Returns
+    -------
+    list
+        For every picture, an Nx2 array: (x,y) points.
+
     """
     weightspath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                "cnn/weights.index")
+    # Build the model before the threads need it, such that it is built once
+    _get_model(weightspath[:-6], quantize=quantize)
+    read_picture = functools.partial(function_from_picture, verbose=verbose,
+                                     quantize=quantize)
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(read_picture, picpaths))
+
+@functools.lru_cache(maxsize=2)
+def _get_model(weightspath, quantize=False):
+    """Define the digit recognition CNN and load its weights. If quantize is
+    True, return its int8 quantized version instead.
+
+    The model is cached, such that it is only built once per process.
+    """
     digitmodel = define_model()
-    digitmodel.load_weights(weightspath[:-6])
-    picpng = im.imread(picpath)
-    picbw = im2xyframe(rgb2bw(picpng))
-    picticks = im2xyframe(rgb2g(picpng))
-    piccurve = im2xyframe(rgb2r(picpng))
-    curveij = get_ijcurve(piccurve)
-    axes = detect_axes(picbw, verbose=verbose)
-    iticks, jticks = get_ticks(picticks, axes)
-    picnr, tick_picids = remove_ticks(picticks, axes, iticks, jticks)
-    tickvals = get_tickvals(picnr, tick_picids, proximity=0.01)
-    ixticks, jyticks = predict_tickvalues(iticks, jticks, tickvals, digitmodel)
-    f = get_xyfunc(curveij,ixticks,jyticks,axes)  # Nx2 array: (x,y) points
-    xsample, fsample = nogibbsdftsample(f[:,1], n, f[:,0])
-    return f, xsample, fsample
+    digitmodel.load_weights(weightspath)
+    if quantize:
+        return quantize_model(digitmodel)
+    return digitmodel
@@ -6,6 +6,9 @@ Methods defined here
 define_model()
     Load the predefined CNN model for digit recognition.
 
+quantize_model(model)
+    Convert the model to a TFLite model with int8 quantized weights.
+
 predict_digit(digit, model)
     Predict a digit from a 28x28 picture.
 
@@ -13,7 +16,9 @@ predict_tickvalues(iticks, jticks, tickvals, model)
     Predict the tickvalues from the tickpics.
 
 """
+import threading
 import numpy as np
+import tensorflow as tf
 from tensorflow import keras
 from keras.models import Sequential
 from keras.layers import Conv2D
@@ -55,6 +60,42 @@ def define_model():
                   metrics=['accuracy'])
     return model
 
+def quantize_model(model):
+    """Convert the model to a TFLite model with int8 quantized weights.
+
+    The quantized model is much cheaper to call than the Keras model, which
+    pays off when many pictures are processed. The conversion itself takes
+    about a second.
+
+    Parameters
+    ----------
+    model : tensorflow.keras.Sequential
+        The model for digit recognition.
+
+    Returns
+    -------
+    callable
+        The quantized model. Like the Keras model, it is called on a
+        (n,28,28,1) float32 batch and returns the (n,10) class probabilities.
+
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    interpreter = tf.lite.Interpreter(model_content=converter.convert())
+    inputid = interpreter.get_input_details()[0]['index']
+    outputid = interpreter.get_output_details()[0]['index']
+    lock = threading.Lock()  # an interpreter is not thread-safe
+
+    def quantized_model(batch, training=False):
+        with lock:
+            interpreter.resize_tensor_input(inputid, batch.shape)
+            interpreter.allocate_tensors()
+            interpreter.set_tensor(inputid, batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(outputid)
+
+    return quantized_model
+
 def predict_digit(digit, model):
     """Predict a digit from a 28x28 picture.
 
@@ -73,7 +114,7 @@ def predict_digit(digit, model):
     """
     digit = np.array([digit])
     digit = digit.reshape((digit.shape[0], 28, 28, 1))
-    pred = model.predict(digit)
+    pred = model.predict(digit, verbose=0)  # no progress bar per digit
     return np.argmax(pred[0])  # 0-9
 
 def predict_tickvalues(iticks, jticks, tickvals, model):
@@ -87,8 +128,8 @@ def predict_tickvalues(iticks, jticks, tickvals, model):
         A list of tick values.
     tickvals : list
         A list of tickpics.
-    model : tensorflow.keras.Sequential
-        The model for digit recognition.
+    model : tensorflow.keras.Sequential or callable
+        The model for digit recognition, or its quantize_model version.
 
     Returns
     -------
@@ -98,19 +139,27 @@ def predict_tickvalues(iticks, jticks, tickvals, model):
         A list of tick values and their predicted values.
 
     """
+    # Predict the digits of all tickvalues with a single call to the model
+    batch = np.array([tickpic for tickpics in tickvals for tickpic in tickpics],
+                     dtype=np.float32).reshape((-1, 28, 28, 1))
+    preds = np.argmax(np.asarray(model(batch, training=False)), axis=1)  # 0-9
+
     ixticks = []
     jyticks = []
     itickpics = tickvals[:len(iticks)]
     jtickpics = tickvals[len(iticks):]
+    n = 0  # index of the first digit of the current tickvalue in preds
     for tick, tickpics in zip(iticks,itickpics):
-        val = ""
-        for tickpic in tickpics:
-            val = val+str(predict_digit(tickpic, model))
-        ixticks.append([tick,int(val)])
+        val = 0
+        for pred in preds[n:n+len(tickpics)]:
+            val = 10*val + int(pred)
+        n += len(tickpics)
+        ixticks.append([tick,val])
     for tick, tickpics in zip(jticks,jtickpics):
-        val = ""
-        for tickpic in tickpics:
-            val = val+str(predict_digit(tickpic, model))
-        jyticks.append([tick,int(val)])
+        val = 0
+        for pred in preds[n:n+len(tickpics)]:
+            val = 10*val + int(pred)
+        n += len(tickpics)
+        jyticks.append([tick,val])
 
     return ixticks, jyticks